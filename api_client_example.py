@@ -9,12 +9,22 @@ Usage:
     python api_client_example.py --prompt "A futuristic robot" --api-url http://localhost:8000
 """
 
-import requests
+import httpx
+import aiofiles
+import asyncio
 import time
-import json
+import orjson
+import zlib
+import zstandard
 import argparse
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+
+# Downloads are copied in 1 MiB raw chunks so large GLB/MP4 files need few
+# Python-level iterations and write() calls
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# The server sends PLY files zstd-compressed to clients that accept it
+ACCEPT_ENCODING = "zstd, gzip"
 
 
 class TrellisAPIClient:
@@ -22,14 +32,33 @@ class TrellisAPIClient:
     
     def __init__(self, api_url: str = "http://localhost:8000"):
         self.api_url = api_url.rstrip('/')
+        # One pooled client for all calls so health/generate/download reuse
+        # the same keep-alive connections instead of reconnecting each time
+        self._session = httpx.Client(
+            base_url=self.api_url,
+            http2=True,
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            timeout=httpx.Timeout(10.0, read=60.0),
+        )
+    
+    def close(self):
+        """Close the underlying connection pool"""
+        self._session.close()
+    
+    def __enter__(self) -> "TrellisAPIClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
         
     def health_check(self) -> dict:
         """Check if the API is healthy and ready"""
         try:
-            response = requests.get(f"{self.api_url}/health", timeout=10)
+            response = self._session.get("/health", timeout=10)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content)
+        except httpx.HTTPError as e:
             raise Exception(f"Health check failed: {e}")
     
     def generate_3d(
@@ -50,6 +79,9 @@ class TrellisAPIClient:
             
         Returns:
             Dictionary with generation results
+        
+        The request only queues the job; this method then follows the job's
+        progress event stream until the final result arrives.
         """
         if formats is None:
             formats = ["mesh", "gaussian"]
@@ -65,16 +97,39 @@ class TrellisAPIClient:
             
         try:
             print(f"Sending generation request for: '{prompt}'")
-            response = requests.post(
-                f"{self.api_url}/generate", 
-                json=payload,
-                timeout=600  # 10 minutes timeout for generation
-            )
+            response = self._session.post("/generate", json=payload)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            job = orjson.loads(response.content)
+            print(f"Job queued: {job['job_id']}")
+            return self.wait_for_job(job['job_id'])
+        except httpx.HTTPError as e:
             raise Exception(f"Generation request failed: {e}")
     
+    def wait_for_job(self, job_id: str) -> dict:
+        """
+        Follow a job's Server-Sent Events stream until it finishes
+        
+        Args:
+            job_id: Job ID from the generation request
+            
+        Returns:
+            Dictionary with generation results
+        """
+        with self._session.stream("GET", f"/jobs/{job_id}/events") as response:
+            response.raise_for_status()
+            
+            for event, data in _iter_sse(response.iter_lines()):
+                if event == "stage":
+                    print(f"  Stage: {data['stage']}")
+                elif event == "step":
+                    print(f"  {data['stage']} step {data['i']}/{data['n']} (ETA {data['eta']:.1f}s)")
+                elif event == "done":
+                    return data
+                elif event == "error":
+                    raise Exception(data['detail'])
+                    
+        raise Exception("Event stream ended before the job finished")
+    
     def download_file(self, job_id: str, filename: str, output_dir: str = ".") -> str:
         """
         Download a generated file
@@ -89,26 +144,200 @@ class TrellisAPIClient:
         """
         output_path = Path(output_dir) / filename
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path, _ = _sidecar_paths(output_path)
         
         try:
-            response = requests.get(
-                f"{self.api_url}/files/{job_id}/{filename}",
-                stream=True,
+            with self._session.stream(
+                "GET",
+                f"/files/{job_id}/{filename}",
+                headers=_resume_headers(output_path),
                 timeout=60
-            )
-            response.raise_for_status()
+            ) as response:
+                mode = _open_mode(response, output_path)
+                if mode is not None:
+                    decoder = _body_decoder(response)
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_raw(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            f.write(decoder.decompress(chunk) if decoder else chunk)
+                        if decoder:
+                            f.write(decoder.flush())
             
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    
-            print(f"Downloaded: {output_path}")
-            return str(output_path)
+            downloaded = _finish_download(response, output_path)
+            if downloaded is None:
+                return self.download_file(job_id, filename, output_dir)
+            return downloaded
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"Download failed: {e}")
 
 
+def _sidecar_paths(output_path: Path) -> Tuple[Path, Path]:
+    """Paths of a file's in-progress download and of its recorded ETag"""
+    return (
+        output_path.with_name(output_path.name + ".part"),
+        output_path.with_name(output_path.name + ".etag"),
+    )
+
+
+def _resume_headers(output_path: Path) -> dict:
+    """
+    Conditional headers for a file that was (partially) downloaded before
+    
+    A complete file is revalidated with If-None-Match, so an unchanged file is
+    answered with 304. A partial file is resumed with Range, guarded by If-Range
+    so that a changed file is sent in full instead.
+    """
+    part_path, etag_path = _sidecar_paths(output_path)
+    if not etag_path.exists():
+        return {}
+    
+    etag = etag_path.read_text().strip()
+    if output_path.exists():
+        return {"If-None-Match": etag}
+    if part_path.exists() and part_path.stat().st_size > 0:
+        # Byte offsets refer to the decoded file, so resume uncompressed
+        return {
+            "Range": f"bytes={part_path.stat().st_size}-",
+            "If-Range": etag,
+            "Accept-Encoding": "identity",
+        }
+    return {}
+
+
+def _record_etag(output_path: Path, response: httpx.Response):
+    """Remember the ETag of a download so a retry can revalidate or resume it"""
+    _, etag_path = _sidecar_paths(output_path)
+    etag = response.headers.get("etag")
+    if etag:
+        etag_path.write_text(etag)
+    else:
+        etag_path.unlink(missing_ok=True)
+
+
+def _open_mode(response: httpx.Response, output_path: Path) -> Optional[str]:
+    """
+    Check a download response before its body is read
+    
+    Returns:
+        The mode to open the .part file with, or None if the response carries
+        no file data (304 up to date, 416 partial file no longer fits)
+    """
+    if response.status_code in (304, 416):
+        return None
+    response.raise_for_status()
+    _record_etag(output_path, response)
+    
+    # 206 continues a partial download, 200 starts over
+    return 'ab' if response.status_code == 206 else 'wb'
+
+
+def _finish_download(response: httpx.Response, output_path: Path) -> Optional[str]:
+    """
+    Complete a download once its body has been written
+    
+    Returns:
+        Path to the downloaded file, or None if the download must be restarted
+    """
+    part_path, _ = _sidecar_paths(output_path)
+    if response.status_code == 304:
+        print(f"Up to date: {output_path}")
+        return str(output_path)
+    
+    if response.status_code == 416:
+        # The partial file does not fit the server's copy; start over
+        part_path.unlink()
+        return None
+    
+    part_path.replace(output_path)
+    print(f"Downloaded: {output_path}")
+    return str(output_path)
+
+
+def _body_decoder(response: httpx.Response):
+    """
+    Streaming decompressor for a body read with iter_raw/aiter_raw
+    
+    Returns None for uncompressed bodies.
+    """
+    encoding = response.headers.get("content-encoding", "identity").lower()
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return None
+
+
+def _iter_sse(lines):
+    """Parse Server-Sent Events lines into (event, data) pairs"""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, orjson.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # keep-alive comment
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+async def _download_one(
+    client: httpx.AsyncClient,
+    job_id: str,
+    filename: str,
+    output_dir: str
+) -> str:
+    """Download a single generated file over a shared async client"""
+    output_path = Path(output_dir) / filename
+    part_path, _ = _sidecar_paths(output_path)
+    
+    async with client.stream(
+        "GET",
+        f"/files/{job_id}/{filename}",
+        headers=_resume_headers(output_path)
+    ) as response:
+        mode = _open_mode(response, output_path)
+        if mode is not None:
+            decoder = _body_decoder(response)
+            async with aiofiles.open(part_path, mode) as f:
+                async for chunk in response.aiter_raw(DOWNLOAD_CHUNK_SIZE):
+                    await f.write(decoder.decompress(chunk) if decoder else chunk)
+                if decoder:
+                    await f.write(decoder.flush())
+    
+    downloaded = _finish_download(response, output_path)
+    if downloaded is None:
+        return await _download_one(client, job_id, filename, output_dir)
+    return downloaded
+
+
+async def _download_all(api_url: str, job_id: str, files: dict, output_dir: str) -> dict:
+    """
+    Download all files of a job concurrently
+    
+    Returns:
+        Dictionary mapping each file type to its local path, or to the
+        exception raised while downloading it
+    """
+    async with httpx.AsyncClient(
+        base_url=api_url,
+        http2=True,
+        headers={"Accept-Encoding": ACCEPT_ENCODING},
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+        timeout=60
+    ) as client:
+        results = await asyncio.gather(
+            *[
+                _download_one(client, job_id, file_url.split('/')[-1], output_dir)
+                for file_url in files.values()
+            ],
+            return_exceptions=True
+        )
+    return dict(zip(files.keys(), results))
+
+
 def main():
     parser = argparse.ArgumentParser(description="TRELLIS Text-to-3D API Client Example")
     parser.add_argument("--prompt", type=str, required=True, help="Text description of 3D object")
@@ -126,76 +355,76 @@ def main():
     
     args = parser.parse_args()
     
-    # Create client
-    client = TrellisAPIClient(args.api_url)
-    
-    try:
-        # Check API health
-        print("Checking API health...")
-        health = client.health_check()
-        print(f"API Status: {health['status']}")
-        print(f"GPU Available: {health['gpu_available']}")
-        print(f"Model Loaded: {health['model_loaded']}")
-        
-        if health['status'] != 'healthy':
-            print("API is not healthy. Please check the server.")
-            return
-        
-        # Prepare generation parameters
-        generation_params = {
-            "ss_steps": args.ss_steps,
-            "ss_cfg_strength": args.ss_cfg,
-            "slat_steps": args.slat_steps,
-            "slat_cfg_strength": args.slat_cfg,
-            "generate_video": not args.no_video,
-            "formats": args.formats
-        }
+    # Create client (closes its connection pool on exit)
+    with TrellisAPIClient(args.api_url) as client:
+    
+        try:
+            # Check API health
+            print("Checking API health...")
+            health = client.health_check()
+            print(f"API Status: {health['status']}")
+            print(f"GPU Available: {health['gpu_available']}")
+            print(f"Model Loaded: {health['model_loaded']}")
         
-        # Generate 3D asset
-        print(f"\nGenerating 3D asset...")
-        print(f"This may take several minutes depending on the complexity...")
+            if health['status'] != 'healthy':
+                print("API is not healthy. Please check the server.")
+                return
         
-        result = client.generate_3d(
-            prompt=args.prompt,
-            seed=args.seed,
-            **generation_params
-        )
+            # Prepare generation parameters
+            generation_params = {
+                "ss_steps": args.ss_steps,
+                "ss_cfg_strength": args.ss_cfg,
+                "slat_steps": args.slat_steps,
+                "slat_cfg_strength": args.slat_cfg,
+                "generate_video": not args.no_video,
+                "formats": args.formats
+            }
         
-        print(f"\nGeneration completed!")
-        print(f"Job ID: {result['job_id']}")
-        print(f"Status: {result['status']}")
-        print(f"Generation Time: {result['generation_time_seconds']:.2f} seconds")
-        print(f"Seed Used: {result['seed']}")
-        
-        # Download generated files
-        if result['files']:
-            print(f"\nDownloading generated files...")
-            output_dir = Path(args.output_dir)
-            output_dir.mkdir(parents=True, exist_ok=True)
+            # Generate 3D asset
+            print(f"\nGenerating 3D asset...")
+            print(f"This may take several minutes depending on the complexity...")
+        
+            result = client.generate_3d(
+                prompt=args.prompt,
+                seed=args.seed,
+                **generation_params
+            )
+        
+            print(f"\nGeneration completed!")
+            print(f"Job ID: {result['job_id']}")
+            print(f"Status: {result['status']}")
+            print(f"Generation Time: {result['generation_time_seconds']:.2f} seconds")
+            print(f"Seed Used: {result['seed']}")
+        
+            # Download generated files
+            if result['files']:
+                print(f"\nDownloading generated files...")
+                output_dir = Path(args.output_dir)
+                output_dir.mkdir(parents=True, exist_ok=True)
             
-            for file_type, file_url in result['files'].items():
-                filename = file_url.split('/')[-1]
-                try:
-                    downloaded_path = client.download_file(
-                        result['job_id'], 
-                        filename, 
-                        args.output_dir
-                    )
-                    print(f"  {file_type}: {downloaded_path}")
-                except Exception as e:
-                    print(f"  Failed to download {file_type}: {e}")
-        
-        # Print model information
-        if result.get('model_info'):
-            print(f"\nModel Information:")
-            for key, value in result['model_info'].items():
-                print(f"  {key}: {value}")
-        
-        print(f"\nGeneration complete! Files saved to: {args.output_dir}")
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        return 1
+                downloads = asyncio.run(_download_all(
+                    client.api_url,
+                    result['job_id'],
+                    result['files'],
+                    args.output_dir
+                ))
+                for file_type, downloaded in downloads.items():
+                    if isinstance(downloaded, Exception):
+                        print(f"  Failed to download {file_type}: {downloaded}")
+                    else:
+                        print(f"  {file_type}: {downloaded}")
+        
+            # Print model information
+            if result.get('model_info'):
+                print(f"\nModel Information:")
+                for key, value in result['model_info'].items():
+                    print(f"  {key}: {value}")
+        
+            print(f"\nGeneration complete! Files saved to: {args.output_dir}")
+        
+        except Exception as e:
+            print(f"Error: {e}")
+            return 1
     
     return 0
 
@@ -0,0 +1,103 @@
+"""
+GLB export worker for the TRELLIS Text-to-3D API
+
+GLB export (mesh simplification, UV unwrapping, texture baking) holds the GIL
+for seconds at a time, so the API server runs it in a separate process. This
+module holds everything that process needs, so spawning it imports TRELLIS and
+nothing of the server itself. Assets and the resulting GLB are handed over
+through shared memory.
+"""
+
+import os
+import io
+from multiprocessing import shared_memory
+from typing import Tuple
+
+os.environ.setdefault('SPCONV_ALGO', 'native')
+
+import torch
+
+from trellis.utils import postprocessing_utils
+from trellis.representations import Gaussian, MeshExtractResult
+
+
+def put_shared(data) -> Tuple[str, int]:
+    """Copy bytes into a new shared memory block and return its (name, size)"""
+    size = len(data)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        shm.buf[:size] = data
+        return shm.name, size
+    finally:
+        shm.close()
+
+
+def take_shared(name: str, size: int) -> bytes:
+    """Copy a shared memory block out and release it"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def release_shared(name: str):
+    """Release a shared memory block that was never taken"""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def pack_glb_inputs(gaussian: Gaussian, mesh: MeshExtractResult) -> Tuple[str, int]:
+    """
+    Serialize the assets needed for GLB export into shared memory
+
+    Gaussian holds local activation functions that cannot be pickled, so only
+    its constructor arguments and parameter tensors are sent and the worker
+    rebuilds it, as postprocessing_utils.simplify_gs does.
+    """
+    state = {
+        'init_params': gaussian.init_params,
+        'gaussian': {
+            name: getattr(gaussian, name).cpu() if getattr(gaussian, name) is not None else None
+            for name in ('_xyz', '_features_dc', '_features_rest', '_scaling', '_rotation', '_opacity')
+        },
+        'vertices': mesh.vertices.cpu(),
+        'faces': mesh.faces.cpu(),
+    }
+    buffer = io.BytesIO()
+    torch.save(state, buffer)
+    return put_shared(buffer.getbuffer())
+
+
+def _export_glb(shm_name: str, size: int, simplify: float, texture_size: int) -> bytes:
+    """Rebuild the assets from shared memory and export them as GLB bytes"""
+    state = torch.load(io.BytesIO(take_shared(shm_name, size)), map_location='cuda', weights_only=False)
+
+    gaussian = Gaussian(**state['init_params'])
+    for name, value in state['gaussian'].items():
+        setattr(gaussian, name, value)
+    mesh = MeshExtractResult(state['vertices'], state['faces'])
+
+    glb = postprocessing_utils.to_glb(
+        gaussian,
+        mesh,
+        simplify=simplify,
+        texture_size=texture_size,
+        verbose=False
+    )
+    return glb.export(file_type='glb')
+
+
+def glb_worker(shm_name: str, size: int, simplify: float, texture_size: int) -> Tuple[str, int]:
+    """Export a GLB in the worker process; returns the (name, size) of the shared block holding it"""
+    try:
+        return put_shared(_export_glb(shm_name, size, simplify, texture_size))
+    finally:
+        # This process has its own caching allocator; hand the multiview render
+        # and texture baking memory back so the sampler in the server can use it
+        torch.cuda.empty_cache()
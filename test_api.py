@@ -9,7 +9,8 @@ Usage:
     python test_api.py --api-url http://localhost:8000
 """
 
-import requests
+import httpx
+import asyncio
 import time
 import argparse
 import json
@@ -17,11 +18,11 @@ import sys
 from pathlib import Path
 
 
-def test_health_check(api_url: str) -> bool:
+async def test_health_check(client: httpx.AsyncClient) -> bool:
     """Test the health check endpoint"""
     print("🏥 Testing health check...")
     try:
-        response = requests.get(f"{api_url}/health", timeout=10)
+        response = await client.get("/health", timeout=10)
         response.raise_for_status()
         health_data = response.json()
         
@@ -41,11 +42,11 @@ def test_health_check(api_url: str) -> bool:
         return False
 
 
-def test_root_endpoint(api_url: str) -> bool:
+async def test_root_endpoint(client: httpx.AsyncClient) -> bool:
     """Test the root endpoint"""
     print("🏠 Testing root endpoint...")
     try:
-        response = requests.get(f"{api_url}/", timeout=10)
+        response = await client.get("/", timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -61,7 +62,27 @@ def test_root_endpoint(api_url: str) -> bool:
         return False
 
 
-def test_generation_simple(api_url: str) -> bool:
+async def wait_for_job(client: httpx.AsyncClient, job_id: str) -> dict:
+    """Follow a job's event stream and return its final result"""
+    event = None
+    
+    async with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        response.raise_for_status()
+        
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "done":
+                    return data
+                if event == "error":
+                    raise RuntimeError(data['detail'])
+                    
+    raise RuntimeError("Event stream ended before the job finished")
+
+
+async def test_generation_simple(client: httpx.AsyncClient) -> bool:
     """Test simple 3D generation"""
     print("🎨 Testing simple 3D generation...")
     print("   (This will take several minutes...)")
@@ -79,15 +100,12 @@ def test_generation_simple(api_url: str) -> bool:
     }
     
     try:
-        start_time = time.time()
-        response = requests.post(
-            f"{api_url}/generate",
-            json=payload,
-            timeout=300  # 5 minutes timeout
-        )
+        start_time = time.monotonic()
+        response = await client.post("/generate", json=payload, timeout=10)
         response.raise_for_status()
-        result = response.json()
-        generation_time = time.time() - start_time
+        job = response.json()
+        result = await asyncio.wait_for(wait_for_job(client, job['job_id']), timeout=300)  # 5 minutes timeout
+        generation_time = time.monotonic() - start_time
         
         print(f"   Job ID: {result['job_id']}")
         print(f"   Status: {result['status']}")
@@ -102,7 +120,7 @@ def test_generation_simple(api_url: str) -> bool:
             print("   ❌ Generation test failed - no files generated")
             return False, None
             
-    except requests.exceptions.Timeout:
+    except (asyncio.TimeoutError, httpx.TimeoutException):
         print("   ❌ Generation test failed - timeout (this is normal for CPU-only systems)")
         return False, None
     except Exception as e:
@@ -110,7 +128,7 @@ def test_generation_simple(api_url: str) -> bool:
         return False, None
 
 
-def test_file_download(api_url: str, result: dict) -> bool:
+async def test_file_download(client: httpx.AsyncClient, result: dict) -> bool:
     """Test file download"""
     print("📥 Testing file download...")
     
@@ -119,24 +137,17 @@ def test_file_download(api_url: str, result: dict) -> bool:
         return True
     
     try:
-        # Try to download the first available file
+        # Check the first available file without transferring its body
         file_type, file_url = next(iter(result['files'].items()))
         filename = file_url.split('/')[-1]
         job_id = result['job_id']
         
-        response = requests.get(
-            f"{api_url}/files/{job_id}/{filename}",
-            timeout=60
-        )
+        response = await client.head(f"/files/{job_id}/{filename}", timeout=60)
         response.raise_for_status()
         
-        # Check if we got some content
-        content_length = len(response.content)
-        print(f"   Downloaded {file_type}: {filename} ({content_length} bytes)")
-
-        # Save the file to the current directory
-        # output_path = Path(filename)
-        # output_path.write_bytes(response.content)
+        # Check if there is some content
+        content_length = int(response.headers.get("content-length", 0))
+        print(f"   Available {file_type}: {filename} ({content_length} bytes)")
         
         if content_length > 0:
             print("   ✅ File download test passed")
@@ -150,7 +161,7 @@ def test_file_download(api_url: str, result: dict) -> bool:
         return False
 
 
-def main():
+async def main():
     parser = argparse.ArgumentParser(description="TRELLIS Text-to-3D API Test Script")
     parser.add_argument("--api-url", type=str, default="http://localhost:8000", 
                        help="API base URL")
@@ -168,28 +179,28 @@ def main():
     tests_passed = 0
     total_tests = 4 if not args.skip_generation else 2
     
-    # Test 1: Health Check
-    if test_health_check(api_url):
-        tests_passed += 1
-    print()
-    
-    # Test 2: Root Endpoint
-    if test_root_endpoint(api_url):
-        tests_passed += 1
-    print()
-    
-    # Test 3: Generation (if not skipped)
-    generation_result = None
-    if not args.skip_generation:
-        success, generation_result = test_generation_simple(api_url)
-        if success:
-            tests_passed += 1
+    # One client (and connection pool) shared by every test
+    async with httpx.AsyncClient(base_url=api_url, http2=True, timeout=300) as client:
+        # Tests 1 and 2: Health Check and Root Endpoint, run concurrently
+        health_ok, root_ok = await asyncio.gather(
+            test_health_check(client),
+            test_root_endpoint(client)
+        )
+        tests_passed += health_ok + root_ok
         print()
         
-        # Test 4: File Download
-        if test_file_download(api_url, generation_result):
-            tests_passed += 1
-        print()
+        # Test 3: Generation (if not skipped)
+        generation_result = None
+        if not args.skip_generation:
+            success, generation_result = await test_generation_simple(client)
+            if success:
+                tests_passed += 1
+            print()
+            
+            # Test 4: File Download
+            if await test_file_download(client, generation_result):
+                tests_passed += 1
+            print()
     
     # Summary
     print("📊 Test Summary")
@@ -205,4 +216,4 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(asyncio.run(main()))
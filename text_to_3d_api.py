@@ -18,21 +18,34 @@ import os
 import sys
 import uuid
 import asyncio
+import functools
+import hashlib
+import heapq
+import io
+import time
+import concurrent.futures
+import multiprocessing as mp
 import tempfile
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-import json
+from typing import Optional, Dict, Any, List, Tuple, Literal, Annotated
 import traceback
 from datetime import datetime
 
 # Environment setup for TRELLIS
 os.environ['SPCONV_ALGO'] = 'native'  # Recommended for single runs
+# Keep freed blocks in the caching allocator between requests instead of
+# returning them to the driver; expandable segments limit fragmentation
+os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True,max_split_size_mb:512')
 
 import torch
 import numpy as np
-import imageio
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+import imageio.v3 as iio
+import aiofiles
+import msgspec
+import zstandard
+from msgspec import Meta
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse, Response
 from pydantic import BaseModel, Field
 from contextlib import asynccontextmanager
 import uvicorn
@@ -40,8 +53,9 @@ import uvicorn
 # TRELLIS imports
 try:
     from trellis.pipelines import TrellisTextTo3DPipeline
-    from trellis.utils import render_utils, postprocessing_utils
+    from trellis.utils import render_utils
     from trellis.representations import Gaussian, MeshExtractResult
+    import glb_export
 except ImportError as e:
     print(f"Error importing TRELLIS modules: {e}")
     print("Make sure TRELLIS is properly installed and accessible")
@@ -49,52 +63,131 @@ except ImportError as e:
 
 # Global variables
 pipeline = None
-MAX_SEED = np.iinfo(np.int32).max
-TEMP_DIR = Path(tempfile.gettempdir()) / "trellis_api"
-TEMP_DIR.mkdir(exist_ok=True)
+pipeline_stream = None
+MAX_SEED = int(np.iinfo(np.int32).max)
+# Put this on a filesystem with fallocate support (ext4, xfs) for large exports
+OUTPUT_DIR = Path(os.environ.get('TRELLIS_API_OUTPUT_DIR', Path(tempfile.gettempdir()) / "trellis_api"))
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Blocking pipeline work runs on a single worker thread (there is one GPU) so the
+# event loop stays free to serve /health and /files while a job is generating
+_EXEC = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+_gpu_semaphore = asyncio.Semaphore(1)
+# GLB export runs in its own process, see glb_export.py
+GLB_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn"))
+EMPTY_CACHE_INTERVAL_SECONDS = 300
+
+# Set TRELLIS_API_COMPILE=0 to skip torch.compile (e.g. where Triton is unavailable)
+COMPILE_MODELS = os.environ.get('TRELLIS_API_COMPILE', '1') == '1'
+COMPILED_MODELS = ['sparse_structure_flow_model']
+
+DEFAULT_PRECISION = "fp16"
+PRECISION_DTYPES = {
+    "fp32": None,
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+}
+
+MEDIA_TYPES = {
+    '.glb': 'model/gltf-binary',
+    '.ply': 'application/octet-stream',
+    '.mp4': 'video/mp4',
+}
+
+# Exports that compress well get a zstd-compressed `<name>.zst` sibling at
+# generation time, served to clients that send `Accept-Encoding: zstd`
+PRECOMPRESS_SUFFIXES = {'.ply'}
+ZSTD_LEVEL = 10
 
 # Cleanup tracking
+FILE_TTL_SECONDS = 3600
 generated_files = {}
+# Min-heap of (expiry timestamp, job_id) so cleanup only touches expired jobs
+_expiry_heap: List[Tuple[float, str]] = []
+_cleanup_lock = asyncio.Lock()
+
+# Requests waiting to be sampled, coalesced into batches by batch_sampler()
+MAX_BATCH = 4
+BATCH_WINDOW_SECONDS = 0.05
+_pending: List[Tuple[str, "TextTo3DRequest", int, asyncio.Future]] = []
+_pending_added = asyncio.Event()
+
+# Jobs by request fingerprint, so identical seeded requests reuse earlier results
+_result_cache: Dict[str, str] = {}
 
+# Running generation tasks (kept referenced so they are not garbage collected)
+_job_tasks = set()
+SSE_KEEPALIVE_SECONDS = 15
 
-class TextTo3DRequest(BaseModel):
-    """Request model for text-to-3D generation"""
-    prompt: str = Field(..., description="Text description of the 3D object to generate", min_length=1)
-    seed: Optional[int] = Field(None, description="Random seed for reproducible generation", ge=0, le=MAX_SEED)
-    formats: List[str] = Field(["mesh", "gaussian"], description="Output formats to generate")
+# /health reports a timestamp that is reformatted at most once per second
+HEALTH_TIMESTAMP_TTL_SECONDS = 1.0
+_cached_ts = float('-inf')
+_cached_iso = ""
+
+
+class TextTo3DRequest(msgspec.Struct, kw_only=True):
+    """Request model for text-to-3D generation (decoded and validated by msgspec)"""
+    prompt: Annotated[str, Meta(min_length=1, description="Text description of the 3D object to generate")]
+    seed: Optional[Annotated[int, Meta(ge=0, le=MAX_SEED, description="Random seed for reproducible generation")]] = None
+    formats: Annotated[List[str], Meta(description="Output formats to generate")] = msgspec.field(default_factory=lambda: ["mesh", "gaussian"])
     
     # Sparse Structure Generation Parameters
-    ss_steps: int = Field(12, description="Sampling steps for sparse structure generation", ge=1, le=50)
-    ss_cfg_strength: float = Field(7.5, description="CFG strength for sparse structure generation", ge=0.0, le=20.0)
+    ss_steps: Annotated[int, Meta(ge=1, le=50, description="Sampling steps for sparse structure generation")] = 12
+    ss_cfg_strength: Annotated[float, Meta(ge=0.0, le=20.0, description="CFG strength for sparse structure generation")] = 7.5
     
     # Structured Latent Generation Parameters  
-    slat_steps: int = Field(12, description="Sampling steps for structured latent generation", ge=1, le=50)
-    slat_cfg_strength: float = Field(7.5, description="CFG strength for structured latent generation", ge=0.0, le=20.0)
+    slat_steps: Annotated[int, Meta(ge=1, le=50, description="Sampling steps for structured latent generation")] = 12
+    slat_cfg_strength: Annotated[float, Meta(ge=0.0, le=20.0, description="CFG strength for structured latent generation")] = 7.5
+    
+    # Numeric precision of the sampling run (the released flow models ship fp16 weights)
+    precision: Annotated[Literal["fp32", "bf16", "fp16"], Meta(description="Autocast precision for the pipeline run")] = DEFAULT_PRECISION
     
     # Output Options
-    generate_video: bool = Field(True, description="Whether to generate preview video")
-    video_frames: int = Field(120, description="Number of frames for video generation", ge=30, le=240)
-    video_fps: int = Field(15, description="Frames per second for video", ge=10, le=60)
+    generate_video: Annotated[bool, Meta(description="Whether to generate preview video")] = True
+    video_frames: Annotated[int, Meta(ge=30, le=240, description="Number of frames for video generation")] = 120
+    video_fps: Annotated[int, Meta(ge=10, le=60, description="Frames per second for video")] = 15
     
     # GLB Export Options (if GLB format requested)
-    simplify_ratio: float = Field(0.95, description="Mesh simplification ratio", ge=0.5, le=1.0)
-    texture_size: int = Field(1024, description="Texture resolution for GLB export", ge=512, le=2048)
+    simplify_ratio: Annotated[float, Meta(ge=0.5, le=1.0, description="Mesh simplification ratio")] = 0.95
+    texture_size: Annotated[int, Meta(ge=512, le=2048, description="Texture resolution for GLB export")] = 1024
 
 
-class TextTo3DResponse(BaseModel):
-    """Response model for text-to-3D generation"""
-    job_id: str = Field(..., description="Unique identifier for this generation job")
-    status: str = Field(..., description="Status of the generation (success, error)")
-    message: str = Field(..., description="Human-readable status message")
-    prompt: str = Field(..., description="The input prompt that was processed")
-    seed: int = Field(..., description="The seed used for generation")
-    generation_time_seconds: float = Field(..., description="Time taken for generation")
+class TextTo3DResponse(msgspec.Struct, kw_only=True):
+    """Response model for text-to-3D generation (sent as the final job event)"""
+    job_id: Annotated[str, Meta(description="Unique identifier for this generation job")]
+    status: Annotated[str, Meta(description="Status of the generation (success, error)")]
+    message: Annotated[str, Meta(description="Human-readable status message")]
+    prompt: Annotated[str, Meta(description="The input prompt that was processed")]
+    seed: Annotated[int, Meta(description="The seed used for generation")]
+    generation_time_seconds: Annotated[float, Meta(description="Time taken for generation")]
     
     # File paths (relative to API base URL)
-    files: Dict[str, str] = Field(default_factory=dict, description="Generated file paths by format")
+    files: Annotated[Dict[str, str], Meta(description="Generated file paths by format")] = msgspec.field(default_factory=dict)
     
     # Metadata
-    model_info: Dict[str, Any] = Field(default_factory=dict, description="Information about the generated model")
+    model_info: Annotated[Dict[str, Any], Meta(description="Information about the generated model")] = msgspec.field(default_factory=dict)
+
+
+# FastAPI does not see msgspec models, so publish the request schema explicitly
+_, _schema_components = msgspec.json.schema_components(
+    [TextTo3DRequest], ref_template="#/components/schemas/{name}"
+)
+GENERATE_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _schema_components["TextTo3DRequest"]}},
+    }
+}
+
+
+class JobResponse(BaseModel):
+    """Response model for a queued generation job"""
+    job_id: str = Field(..., description="Unique identifier for this generation job")
+    status: str = Field(..., description="Status of the job (queued, running, or cached for a repeated request)")
+    message: str = Field(..., description="Human-readable status message")
+    prompt: str = Field(..., description="The input prompt that was queued")
+    seed: int = Field(..., description="The seed that will be used for generation")
+    events_url: str = Field(..., description="Server-Sent Events stream with progress and the final result")
 
 
 class HealthResponse(BaseModel):
@@ -106,16 +199,91 @@ class HealthResponse(BaseModel):
     timestamp: str
 
 
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the pipeline executor without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXEC, functools.partial(func, *args, **kwargs))
+
+
+def run_pipeline(*args, dtype: Optional[torch.dtype] = None, **kwargs) -> List[dict]:
+    """
+    Run a batch of prompts on the pipeline's dedicated high-priority CUDA stream
+    
+    If `dtype` is given, the run is autocast to that reduced precision.
+    """
+    if pipeline_stream is None:
+        return pipeline.run_batch(*args, **kwargs)
+    
+    # Order the side stream against the default stream on both ends so outputs
+    # are ready (and earlier memory is free) when export/rendering use them
+    default_stream = torch.cuda.current_stream()
+    pipeline_stream.wait_stream(default_stream)
+    with torch.cuda.stream(pipeline_stream), \
+            torch.autocast("cuda", dtype=dtype or torch.float16, enabled=dtype is not None):
+        outputs = pipeline.run_batch(*args, **kwargs)
+    default_stream.wait_stream(pipeline_stream)
+    return outputs
+
+
+async def compile_pipeline():
+    """
+    Compile the sampler models and warm them up
+    
+    Only models with fixed input shapes are compiled: the sparse structure flow
+    model always sees a (B, C, R, R, R) latent, so it compiles once per batch
+    size and autocast precision. The structured latent models take sparse
+    tensors whose size changes with every asset and would recompile on each
+    request.
+    
+    CUDA graphs are not used: the CFG samplers call the model for the
+    conditional and the unconditional prediction before combining them, and a
+    second graph replay would overwrite the first call's output buffer.
+    """
+    # Keep every (precision, batch size) variant compiled instead of letting
+    # dynamo fall back to eager once its default cache limit is exceeded
+    torch._dynamo.config.cache_size_limit = max(
+        torch._dynamo.config.cache_size_limit, len(PRECISION_DTYPES) * MAX_BATCH
+    )
+    for name in COMPILED_MODELS:
+        pipeline.models[name] = torch.compile(
+            pipeline.models[name],
+            mode="max-autotune-no-cudagraphs",
+            fullgraph=False,
+            dynamic=False
+        )
+    
+    # Compile on the executor thread for every precision a request can ask for
+    # (dynamo guards on the autocast state) and every batch size
+    # batch_sampler() can form, so no request pays for a recompile while
+    # holding the GPU. Two guided steps exercise both model calls of the CFG
+    # sampler the way a real request does
+    print("Compiling sampler models (this may take a few minutes)...")
+    for dtype in PRECISION_DTYPES.values():
+        for batch_size in range(1, MAX_BATCH + 1):
+            await run_blocking(
+                run_pipeline,
+                ["warmup"] * batch_size,
+                list(range(batch_size)),
+                dtype=dtype,
+                sparse_structure_sampler_params={"steps": 2, "cfg_strength": 7.5},
+                slat_sampler_params={"steps": 1},
+            )
+
+
 async def load_pipeline():
     """Load the TRELLIS pipeline on startup"""
-    global pipeline
+    global pipeline, pipeline_stream
     try:
         print("Loading TRELLIS text-to-3D pipeline...")
         pipeline = TrellisTextTo3DPipeline.from_pretrained("microsoft/TRELLIS-text-xlarge")
         
         if torch.cuda.is_available():
             pipeline.cuda()
+            pipeline_stream = torch.cuda.Stream(priority=-1)
             print(f"Pipeline loaded on GPU: {torch.cuda.get_device_name()}")
+            
+            if COMPILE_MODELS:
+                await compile_pipeline()
         else:
             print("Warning: CUDA not available, using CPU (will be very slow)")
             
@@ -129,26 +297,44 @@ async def load_pipeline():
 
 async def cleanup_old_files():
     """Background task to cleanup old generated files"""
-    try:
-        current_time = datetime.now().timestamp()
-        files_to_remove = []
-        
-        for job_id, file_info in generated_files.items():
-            # Remove files older than 1 hour
-            if current_time - file_info.get('timestamp', 0) > 3600:
-                files_to_remove.append(job_id)
+    # A cleanup already draining the heap covers this request too
+    if _cleanup_lock.locked():
+        return
+    
+    async with _cleanup_lock:
+        try:
+            current_time = datetime.now().timestamp()
+            
+            while _expiry_heap and _expiry_heap[0][0] <= current_time:
+                _, job_id = heapq.heappop(_expiry_heap)
                 
-        for job_id in files_to_remove:
-            file_info = generated_files.pop(job_id, {})
-            for file_path in file_info.get('files', {}).values():
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                except Exception as e:
-                    print(f"Error removing file {file_path}: {e}")
-                    
-    except Exception as e:
-        print(f"Error in cleanup task: {e}")
+                # Skip stale entries for jobs that were refreshed or already removed
+                file_info = generated_files.get(job_id)
+                if file_info is None or file_info['timestamp'] + FILE_TTL_SECONDS > current_time:
+                    continue
+                
+                del generated_files[job_id]
+                if _result_cache.get(file_info.get('cache_key')) == job_id:
+                    del _result_cache[file_info['cache_key']]
+                for file_path in file_info.get('files', {}).values():
+                    for path in (file_path, precompressed_path(file_path)):
+                        try:
+                            if os.path.exists(path):
+                                os.remove(path)
+                        except Exception as e:
+                            print(f"Error removing file {path}: {e}")
+                        
+        except Exception as e:
+            print(f"Error in cleanup task: {e}")
+
+
+async def periodic_empty_cache():
+    """Background task that releases cached GPU memory outside request latency"""
+    while True:
+        await asyncio.sleep(EMPTY_CACHE_INTERVAL_SECONDS)
+        # empty_cache synchronizes the device, so never run it during a generation
+        if torch.cuda.is_available() and not _gpu_semaphore.locked():
+            torch.cuda.empty_cache()
 
 
 @asynccontextmanager
@@ -156,9 +342,15 @@ async def lifespan(app: FastAPI):
     """Manage application lifespan"""
     # Startup
     await load_pipeline()
+    empty_cache_task = asyncio.create_task(periodic_empty_cache())
+    batcher_task = asyncio.create_task(batch_sampler())
     yield
     # Shutdown
     print("Shutting down...")
+    empty_cache_task.cancel()
+    batcher_task.cancel()
+    _EXEC.shutdown(wait=False)
+    GLB_POOL.shutdown(wait=False, cancel_futures=True)
 
 
 # Create FastAPI app
@@ -166,178 +358,383 @@ app = FastAPI(
     title="TRELLIS Text-to-3D API",
     description="Generate 3D assets from text descriptions using TRELLIS",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 
-@app.get("/", response_class=JSONResponse)
+@app.get("/")
 async def root():
     """Root endpoint with API information"""
-    return {
+    return ORJSONResponse({
         "name": "TRELLIS Text-to-3D API",
         "version": "1.0.0",
         "description": "Generate 3D assets from text descriptions",
         "endpoints": {
-            "/generate": "POST - Generate 3D model from text",
+            "/generate": "POST - Queue 3D model generation from text",
+            "/jobs/{job_id}/events": "GET - Job progress and result (Server-Sent Events)",
             "/health": "GET - Health check",
             "/files/{job_id}/{filename}": "GET - Download generated files",
             "/docs": "GET - Interactive API documentation"
         }
-    }
+    })
+
+
+def health_timestamp() -> str:
+    """Current time in ISO format, refreshed at most every HEALTH_TIMESTAMP_TTL_SECONDS"""
+    global _cached_ts, _cached_iso
+    now = time.monotonic()
+    if now - _cached_ts > HEALTH_TIMESTAMP_TTL_SECONDS:
+        _cached_ts = now
+        _cached_iso = datetime.now().isoformat()
+    return _cached_iso
 
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse(
+    # Responses are built from trusted values, so skip re-validating them
+    return ORJSONResponse(HealthResponse.model_construct(
         status="healthy" if pipeline is not None else "unhealthy",
         message="API is running" if pipeline is not None else "Pipeline not loaded",
         gpu_available=torch.cuda.is_available(),
         model_loaded=pipeline is not None,
-        timestamp=datetime.now().isoformat()
+        timestamp=health_timestamp()
+    ).model_dump())
+
+
+def write_file(path: Path, data: bytes):
+    """
+    Write a file with positioned writes after reserving its full size
+    
+    Preallocating with posix_fallocate gives the filesystem one contiguous
+    extent for large GLB/PLY exports instead of growing the file write by write.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        size = len(data)
+        if size and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass  # Filesystem does not support preallocation
+        
+        view = memoryview(data)
+        offset = 0
+        while offset < size:
+            offset += os.pwrite(fd, view[offset:], offset)
+    finally:
+        os.close(fd)
+
+
+def precompressed_path(path) -> Path:
+    """Path of a file's zstd-compressed sibling"""
+    path = Path(path)
+    return path.with_name(path.name + '.zst')
+
+
+def write_export(path: Path, data: bytes):
+    """
+    Write an exported file, plus its zstd-compressed sibling if the format compresses well
+    
+    The sibling is compressed from the bytes already in memory and renamed into
+    place once complete, so /files never serves a partial .zst.
+    """
+    write_file(path, data)
+    if path.suffix.lower() in PRECOMPRESS_SUFFIXES:
+        zst_path = precompressed_path(path)
+        tmp_path = zst_path.with_name(zst_path.name + '.tmp')
+        write_file(tmp_path, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data))
+        tmp_path.replace(zst_path)
+
+
+async def export_glb(gaussian: Gaussian, mesh: MeshExtractResult, simplify: float, texture_size: int) -> bytes:
+    """Export a GLB in the GLB_POOL process without holding this process's GIL"""
+    shm_name, size = await run_blocking(glb_export.pack_glb_inputs, gaussian, mesh)
+    # The worker has its own CUDA context and allocator, so blocks this process
+    # keeps cached from sampling would otherwise be unavailable for its
+    # multiview render and texture bake
+    if torch.cuda.is_available():
+        await run_blocking(torch.cuda.empty_cache)
+    try:
+        future = GLB_POOL.submit(glb_export.glb_worker, shm_name, size, simplify, texture_size)
+        glb_name, glb_size = await asyncio.wrap_future(future)
+    except BaseException:
+        # The worker may not have got to consume the input block
+        glb_export.release_shared(shm_name)
+        raise
+    return glb_export.take_shared(glb_name, glb_size)
+
+
+def composite_video(video_components: List[List[np.ndarray]]) -> np.ndarray:
+    """
+    Place rendered videos side by side in a single (T, H, W * n, C) uint8 array
+    
+    The output is allocated once and every (uint8, as returned by
+    render_utils.render_frames) frame is copied straight into its strided
+    slot, so each pixel is written exactly once.
+    """
+    num_frames = len(video_components[0])
+    height, width, channels = video_components[0][0].shape
+    video = np.empty((num_frames, height, width * len(video_components), channels), dtype=np.uint8)
+    
+    for i, component in enumerate(video_components):
+        panel = video[:, :, i * width:(i + 1) * width, :]
+        for t, frame in enumerate(component):
+            panel[t] = frame
+    
+    return video
+
+
+def push_job_event(job_info: dict, event: str, data: dict):
+    """Record a job event and wake up its SSE subscribers (event loop thread only)"""
+    job_info['events'].append((event, data))
+    job_info['new_event'].set()
+    job_info['new_event'] = asyncio.Event()
+
+
+def make_step_callback(loop: asyncio.AbstractEventLoop, job_info: dict, stage: str):
+    """
+    Build a sampler callback that reports step progress from the executor thread
+    
+    Callbacks for every stage are built before the pipeline run starts, so the
+    stage clock starts when the sampler reports step 0, not here.
+    """
+    stage_start = None
+    
+    def callback(step: int, steps: int):
+        nonlocal stage_start
+        if step == 0 or stage_start is None:
+            stage_start = time.monotonic()
+        if step == 0:
+            return
+        elapsed = time.monotonic() - stage_start
+        eta = elapsed / step * (steps - step)
+        loop.call_soon_threadsafe(
+            push_job_event, job_info, "step",
+            {"stage": stage, "i": step, "n": steps, "eta": round(eta, 2)}
+        )
+    
+    return callback
+
+
+def batch_key(request: TextTo3DRequest) -> tuple:
+    """Requests can share a pipeline run only if their sampler settings match"""
+    return (
+        request.ss_steps,
+        request.ss_cfg_strength,
+        request.slat_steps,
+        request.slat_cfg_strength,
+        request.precision,
     )
 
 
-@app.post("/generate", response_model=TextTo3DResponse)
-async def generate_3d_from_text(
-    request: TextTo3DRequest,
-    background_tasks: BackgroundTasks
-):
+async def batch_sampler():
     """
-    Generate a 3D asset from text description
+    Background task that samples pending requests in batches
     
-    This endpoint processes a text prompt and generates 3D assets in the requested formats.
-    The generation process may take several minutes depending on the complexity and settings.
+    After the first request arrives it waits BATCH_WINDOW_SECONDS for more, then
+    runs up to MAX_BATCH requests with identical sampler settings through one
+    pipeline call. Requests with other settings stay queued for the next round.
     """
-    if pipeline is None:
-        raise HTTPException(status_code=503, detail="Pipeline not loaded")
+    loop = asyncio.get_running_loop()
     
-    job_id = str(uuid.uuid4())
-    start_time = datetime.now()
+    while True:
+        await _pending_added.wait()
+        await asyncio.sleep(BATCH_WINDOW_SECONDS)
+        
+        async with _gpu_semaphore:
+            key = batch_key(_pending[0][1])
+            batch = [item for item in _pending if batch_key(item[1]) == key][:MAX_BATCH]
+            for item in batch:
+                _pending.remove(item)
+            if not _pending:
+                _pending_added.clear()
+            
+            job_infos = [generated_files[job_id] for job_id, _, _, _ in batch]
+            for job_info in job_infos:
+                job_info['status'] = "running"
+                job_info['started'] = time.monotonic()
+                push_job_event(job_info, "stage", {"stage": "sampling", "batch_size": len(batch)})
+            
+            ss_callbacks = [make_step_callback(loop, job_info, "ss") for job_info in job_infos]
+            slat_callbacks = [make_step_callback(loop, job_info, "slat") for job_info in job_infos]
+            request = batch[0][1]
+            
+            try:
+                # Don't specify formats to get all by default (gaussian, mesh, radiance_field)
+                # Each job filters the saved files based on its request later
+                outputs = await run_blocking(
+                    run_pipeline,
+                    [item[1].prompt for item in batch],
+                    [item[2] for item in batch],
+                    dtype=PRECISION_DTYPES[request.precision],
+                    sparse_structure_sampler_params={
+                        "steps": request.ss_steps,
+                        "cfg_strength": request.ss_cfg_strength,
+                        "callback": lambda i, n: [cb(i, n) for cb in ss_callbacks],
+                    },
+                    slat_sampler_params={
+                        "steps": request.slat_steps,
+                        "cfg_strength": request.slat_cfg_strength,
+                        "callback": lambda i, n: [cb(i, n) for cb in slat_callbacks],
+                    },
+                )
+            except Exception as e:
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, _, _, future), job_outputs in zip(batch, outputs):
+                    if job_outputs is None:
+                        future.set_exception(RuntimeError("Sparse structure generation produced an empty shape"))
+                    else:
+                        future.set_result(job_outputs)
+
+
+async def run_generation_job(job_id: str, request: TextTo3DRequest, seed: int):
+    """Run a queued generation job and publish its progress as job events"""
+    job_info = generated_files[job_id]
+    job_dir = Path(job_info['job_dir'])
+    loop = asyncio.get_running_loop()
     
     try:
-        # Set random seed
-        seed = request.seed if request.seed is not None else np.random.randint(0, MAX_SEED)
+        # Sampling is batched with other pending requests by batch_sampler()
+        outputs_future = loop.create_future()
+        _pending.append((job_id, request, seed, outputs_future))
+        _pending_added.set()
+        outputs = await outputs_future
+        start_time = job_info['started']
         
-        # Create job directory
-        job_dir = TEMP_DIR / job_id
-        job_dir.mkdir(exist_ok=True)
-        
-        print(f"Starting generation for job {job_id}: '{request.prompt}' (seed: {seed})")
-        
-        # Run the pipeline - don't specify formats to get all by default (gaussian, mesh, radiance_field)
-        # We'll filter the saved files based on user request later
-        outputs = pipeline.run(
-            request.prompt,
-            seed=seed,
-            sparse_structure_sampler_params={
-                "steps": request.ss_steps,
-                "cfg_strength": request.ss_cfg_strength,
-            },
-            slat_sampler_params={
-                "steps": request.slat_steps,
-                "cfg_strength": request.slat_cfg_strength,
-            },
-        )
-        
-        generated_files_info = {}
-        model_info = {
-            "formats_generated": list(outputs.keys()),
-            "num_gaussians": len(outputs.get('gaussian', [])),
-            "num_meshes": len(outputs.get('mesh', [])),
-            "num_radiance_fields": len(outputs.get('radiance_field', []))
-        }
+        # Hold the GPU for the whole export/render sequence so concurrent
+        # requests queue here instead of interleaving and running out of memory
+        async with _gpu_semaphore:
+            generated_files_info = {}
+            model_info = {
+                "formats_generated": list(outputs.keys()),
+                "num_gaussians": len(outputs.get('gaussian', [])),
+                "num_meshes": len(outputs.get('mesh', [])),
+                "num_radiance_fields": len(outputs.get('radiance_field', []))
+            }
+            
+            push_job_event(job_info, "stage", {"stage": "export"})
         
-        # Save outputs in requested formats
-        for format_name, format_outputs in outputs.items():
-            if format_outputs and len(format_outputs) > 0:  # Check if there are outputs for this format
-                if format_name == 'gaussian' and 'gaussian' in request.formats:
-                    # Save Gaussian as PLY only if user requested it
-                    try:
-                        ply_path = job_dir / f"{job_id}_gaussian.ply"
-                        format_outputs[0].save_ply(str(ply_path))
-                        generated_files_info['gaussian_ply'] = str(ply_path)
-                        print(f"  Saved Gaussian PLY: {ply_path}")
-                    except Exception as e:
-                        print(f"  Error saving Gaussian PLY: {e}")
-                        
-                elif format_name == 'mesh' and 'mesh' in request.formats:
-                    # Generate GLB file - now we should always have both gaussian and mesh
-                    try:
-                        if 'gaussian' in outputs and outputs['gaussian'] and len(outputs['gaussian']) > 0:
-                            glb = postprocessing_utils.to_glb(
-                                outputs['gaussian'][0],
-                                outputs['mesh'][0],
-                                simplify=request.simplify_ratio,
-                                texture_size=request.texture_size,
-                                verbose=False
+            # Save outputs in requested formats. Exports are serialized to memory on
+            # the pipeline executor and written to disk on the default executor,
+            # so the writes overlap with rendering the preview video
+            file_writes = {}
+            for format_name, format_outputs in outputs.items():
+                if format_outputs and len(format_outputs) > 0:  # Check if there are outputs for this format
+                    if format_name == 'gaussian' and 'gaussian' in request.formats:
+                        # Save Gaussian as PLY only if user requested it
+                        try:
+                            ply_path = job_dir / f"{job_id}_gaussian.ply"
+                            ply_buffer = io.BytesIO()
+                            await run_blocking(format_outputs[0].save_ply, ply_buffer)
+                            file_writes['gaussian_ply'] = (
+                                ply_path,
+                                loop.run_in_executor(None, write_export, ply_path, ply_buffer.getbuffer())
                             )
-                            glb_path = job_dir / f"{job_id}_mesh.glb"
-                            glb.export(str(glb_path))
-                            generated_files_info['mesh_glb'] = str(glb_path)
-                            print(f"  Saved Mesh GLB: {glb_path}")
-                        else:
-                            print(f"  Error: No gaussian available for GLB export")
-                    except Exception as e:
-                        print(f"  Error saving Mesh GLB: {e}")
+                        except Exception as e:
+                            print(f"  Error saving Gaussian PLY: {e}")
                         
-                elif format_name == 'radiance_field':
-                    # For radiance field, we might need different handling
-                    # print(f"  Radiance field format found but not implemented for file export")
-                    pass
-                    
-        print(f"Generated files: {list(generated_files_info.keys())}")
+                    elif format_name == 'mesh' and 'mesh' in request.formats:
+                        # Generate GLB file - now we should always have both gaussian and mesh
+                        try:
+                            if 'gaussian' in outputs and outputs['gaussian'] and len(outputs['gaussian']) > 0:
+                                glb_bytes = await export_glb(
+                                    outputs['gaussian'][0],
+                                    outputs['mesh'][0],
+                                    simplify=request.simplify_ratio,
+                                    texture_size=request.texture_size
+                                )
+                                glb_path = job_dir / f"{job_id}_mesh.glb"
+                                file_writes['mesh_glb'] = (
+                                    glb_path,
+                                    loop.run_in_executor(None, write_export, glb_path, glb_bytes)
+                                )
+                            else:
+                                print(f"  Error: No gaussian available for GLB export")
+                        except Exception as e:
+                            print(f"  Error saving Mesh GLB: {e}")
+                        
+                    elif format_name == 'radiance_field':
+                        # For radiance field, we might need different handling
+                        # print(f"  Radiance field format found but not implemented for file export")
+                        pass
         
-        # Generate preview video if requested
-        if request.generate_video and outputs:
-            try:
-                video_components = []
+            # Generate preview video if requested
+            if request.generate_video and outputs:
+                push_job_event(job_info, "stage", {"stage": "video"})
                 
-                # Try to render different representations
-                if 'gaussian' in outputs and outputs['gaussian']:
-                    video_gaussian = render_utils.render_video(
-                        outputs['gaussian'][0], 
-                        num_frames=request.video_frames
-                    )['color']
-                    video_components.append(video_gaussian)
+                try:
+                    video_components = []
                     
-                if 'mesh' in outputs and outputs['mesh']:
-                    video_mesh = render_utils.render_video(
-                        outputs['mesh'][0], 
-                        num_frames=request.video_frames
-                    )['normal']
-                    video_components.append(video_mesh)
+                    # Both representations are rendered along the same orbit, so
+                    # the camera matrices are built once (and cached across jobs)
+                    extrinsics, intrinsics = await run_blocking(
+                        render_utils.build_camera_ring,
+                        request.video_frames
+                    )
+                    render_options = {'resolution': 512, 'bg_color': (0, 0, 0)}
                 
-                # Combine videos side by side if multiple components
-                if len(video_components) > 1:
-                    video = [np.concatenate([comp[i] for comp in video_components], axis=1) 
-                            for i in range(len(video_components[0]))]
-                else:
-                    video = video_components[0] if video_components else None
+                    # Try to render different representations
+                    if 'gaussian' in outputs and outputs['gaussian']:
+                        video_gaussian = (await run_blocking(
+                            render_utils.render_frames,
+                            outputs['gaussian'][0],
+                            extrinsics,
+                            intrinsics,
+                            render_options
+                        ))['color']
+                        video_components.append(video_gaussian)
                     
-                if video:
-                    video_path = job_dir / f"{job_id}_preview.mp4"
-                    imageio.mimsave(str(video_path), video, fps=request.video_fps)
-                    generated_files_info['preview_video'] = str(video_path)
+                    if 'mesh' in outputs and outputs['mesh']:
+                        video_mesh = (await run_blocking(
+                            render_utils.render_frames,
+                            outputs['mesh'][0],
+                            extrinsics,
+                            intrinsics,
+                            render_options
+                        ))['normal']
+                        video_components.append(video_mesh)
+                
+                    # Combine videos side by side
+                    if video_components:
+                        video = await run_blocking(composite_video, video_components)
+                        video_path = job_dir / f"{job_id}_preview.mp4"
+                        await run_blocking(
+                            iio.imwrite,
+                            str(video_path),
+                            video,
+                            plugin="FFMPEG",
+                            fps=request.video_fps,
+                            codec="libx264",
+                            macro_block_size=1
+                        )
+                        generated_files_info['preview_video'] = str(video_path)
                     
+                except Exception as e:
+                    print(f"Warning: Could not generate preview video: {e}")
+        
+        for file_type, (file_path, write) in file_writes.items():
+            try:
+                await write
+                generated_files_info[file_type] = str(file_path)
+                print(f"  Saved {file_type}: {file_path}")
             except Exception as e:
-                print(f"Warning: Could not generate preview video: {e}")
+                print(f"  Error saving {file_type}: {e}")
         
-        # Clear GPU memory
-        torch.cuda.empty_cache()
+        print(f"Generated files: {list(generated_files_info.keys())}")
         
-        generation_time = (datetime.now() - start_time).total_seconds()
+        generation_time = time.monotonic() - start_time
         
-        # Store file information for later retrieval
-        generated_files[job_id] = {
-            'files': generated_files_info,
-            'timestamp': datetime.now().timestamp(),
-            'job_dir': str(job_dir)
+        # Store file information for later retrieval, indexed by download name
+        job_info['files'] = generated_files_info
+        job_info['by_name'] = {
+            Path(path).name: (path, MEDIA_TYPES.get(Path(path).suffix.lower(), 'application/octet-stream'))
+            for path in generated_files_info.values()
         }
         
-        # Schedule cleanup task
-        background_tasks.add_task(cleanup_old_files)
-        
         print(f"Generation completed for job {job_id} in {generation_time:.2f}s")
         
         # Convert absolute paths to relative API paths
@@ -346,7 +743,7 @@ async def generate_3d_from_text(
             filename = Path(file_path).name
             api_files[file_type] = f"/files/{job_id}/{filename}"
         
-        return TextTo3DResponse(
+        result = TextTo3DResponse(
             job_id=job_id,
             status="success",
             message="3D asset generated successfully",
@@ -356,53 +753,378 @@ async def generate_3d_from_text(
             files=api_files,
             model_info=model_info
         )
+        job_info['status'] = "success"
+        job_info['complete'] = expected_file_types(request) <= generated_files_info.keys()
+        if not job_info['complete']:
+            # Some exports failed; identical requests should generate again
+            # rather than reuse this partial result
+            cache_key = job_info.get('cache_key')
+            if _result_cache.get(cache_key) == job_id:
+                del _result_cache[cache_key]
+        push_job_event(job_info, "done", result)
         
     except Exception as e:
-        # Clean up on error
-        if job_id in generated_files:
-            del generated_files[job_id]
-        
         error_msg = f"Error generating 3D asset: {str(e)}"
         print(error_msg)
         traceback.print_exc()
         
-        # Clear GPU memory on error too
-        torch.cuda.empty_cache()
+        job_info['status'] = "error"
+        push_job_event(job_info, "error", {"detail": error_msg})
+    
+    finally:
+        # Finished jobs (including failed ones, so clients can still read the
+        # error event) expire after the TTL
+        job_info['timestamp'] = datetime.now().timestamp()
+        heapq.heappush(_expiry_heap, (job_info['timestamp'] + FILE_TTL_SECONDS, job_id))
+        _job_tasks.discard(asyncio.current_task())
+
+
+def expected_file_types(request: TextTo3DRequest) -> set:
+    """File types a fully successful job for this request produces"""
+    expected = set()
+    if 'gaussian' in request.formats:
+        expected.add('gaussian_ply')
+    if 'mesh' in request.formats:
+        expected.add('mesh_glb')
+    if request.generate_video:
+        expected.add('preview_video')
+    return expected
+
+
+def request_cache_key(request: TextTo3DRequest) -> str:
+    """Fingerprint of everything in a request that affects its generated files"""
+    payload = msgspec.json.encode(request)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def cached_job_for(cache_key: Optional[str]) -> Optional[Tuple[str, dict]]:
+    """
+    Find a live job for an identical earlier request
+    
+    Finished jobs are only reused if every requested file was produced and is
+    still on disk, and reusing one pushes its expiry back by another TTL.
+    """
+    job_id = _result_cache.get(cache_key)
+    job_info = generated_files.get(job_id)
+    if job_info is None or job_info['status'] == "error":
+        return None
+    
+    if job_info['status'] == "success":
+        if not job_info.get('complete'):
+            return None
+        try:
+            for file_path in job_info['files'].values():
+                os.stat(file_path)
+        except FileNotFoundError:
+            return None
         
-        raise HTTPException(status_code=500, detail=error_msg)
+        job_info['timestamp'] = datetime.now().timestamp()
+        heapq.heappush(_expiry_heap, (job_info['timestamp'] + FILE_TTL_SECONDS, job_id))
+    
+    return job_id, job_info
 
 
-@app.get("/files/{job_id}/{filename}")
-async def download_file(job_id: str, filename: str):
-    """Download a generated file"""
+@app.post("/generate", response_model=JobResponse, openapi_extra=GENERATE_OPENAPI_EXTRA)
+async def generate_3d_from_text(
+    http_request: Request,
+    background_tasks: BackgroundTasks
+):
+    """
+    Queue a 3D asset generation from text description
+    
+    This endpoint returns immediately with a job ID. Generation may take several
+    minutes depending on the complexity and settings; follow its progress and
+    final result on the `/jobs/{job_id}/events` Server-Sent Events stream.
+    """
+    # Decode and validate straight from the raw body in msgspec's C decoder
+    try:
+        request = msgspec.json.decode(await http_request.body(), type=TextTo3DRequest)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Pipeline not loaded")
+    
+    # Identical requests with an explicit seed reuse the earlier job's result
+    cache_key = request_cache_key(request) if request.seed is not None else None
+    cached_job = cached_job_for(cache_key)
+    if cached_job is not None:
+        job_id, job_info = cached_job
+        print(f"Reusing job {job_id} for identical request: '{request.prompt}' (seed: {request.seed})")
+        return ORJSONResponse(JobResponse.model_construct(
+            job_id=job_id,
+            status="cached" if job_info['status'] == "success" else job_info['status'],
+            message="Identical request already generated" if job_info['status'] == "success" else "Identical request already queued",
+            prompt=request.prompt,
+            seed=request.seed,
+            events_url=f"/jobs/{job_id}/events"
+        ).model_dump())
+    
+    job_id = str(uuid.uuid4())
+    
+    # Set random seed
+    seed = request.seed if request.seed is not None else int(np.random.randint(0, MAX_SEED))
+    
+    # Create job directory
+    job_dir = OUTPUT_DIR / job_id
+    job_dir.mkdir(exist_ok=True)
+    
+    generated_files[job_id] = {
+        'status': "queued",
+        'files': {},
+        'by_name': {},
+        'timestamp': datetime.now().timestamp(),
+        'job_dir': str(job_dir),
+        'events': [],
+        'new_event': asyncio.Event(),
+        'cache_key': cache_key,
+    }
+    push_job_event(generated_files[job_id], "queued", {"job_id": job_id})
+    if cache_key is not None:
+        _result_cache[cache_key] = job_id
+    
+    print(f"Queued generation for job {job_id}: '{request.prompt}' (seed: {seed})")
+    
+    task = asyncio.create_task(run_generation_job(job_id, request, seed))
+    _job_tasks.add(task)
+    
+    # Schedule cleanup task
+    background_tasks.add_task(cleanup_old_files)
+    
+    return ORJSONResponse(JobResponse.model_construct(
+        job_id=job_id,
+        status="queued",
+        message="Generation job queued",
+        prompt=request.prompt,
+        seed=seed,
+        events_url=f"/jobs/{job_id}/events"
+    ).model_dump())
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Stream job progress as Server-Sent Events
+    
+    Events are `queued`, `stage`, `step` (with `i`, `n` and `eta` seconds for the
+    current sampler), and finally `done` (the full generation result) or `error`.
+    Every event of the job is replayed from the start, so reconnecting is safe.
+    """
     if job_id not in generated_files:
         raise HTTPException(status_code=404, detail="Job not found")
     
     job_info = generated_files[job_id]
-    file_path = None
     
-    # Find the file path
-    for file_type, path in job_info['files'].items():
-        if Path(path).name == filename:
-            file_path = path
-            break
+    async def event_stream():
+        sent = 0
+        while True:
+            waiter = job_info['new_event']
+            pending = job_info['events'][sent:]
+            
+            if not pending:
+                try:
+                    await asyncio.wait_for(waiter.wait(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                continue
+            
+            for event, data in pending:
+                yield f"event: {event}\ndata: {msgspec.json.encode(data).decode()}\n\n"
+            sent += len(pending)
+            
+            if pending[-1][0] in ("done", "error"):
+                return
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """
+    Whether an `Accept-Encoding` header accepts a content coding
+    
+    The coding must be listed (or matched by `*`) with a non-zero q-value.
+    """
+    wildcard = False
+    for item in accept_encoding.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        name = name.lower()
+        if name == coding:
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return wildcard
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag derived from a file's modification time and size"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+# parse_byte_range() result for a well-formed range that starts past the end of the file
+RANGE_NOT_SATISFIABLE = "unsatisfiable"
+
+
+def parse_byte_range(range_header: str, file_size: int):
+    """
+    Parse a single-range `Range: bytes=...` header
+    
+    Returns:
+        Inclusive (start, end) offsets; RANGE_NOT_SATISFIABLE for a well-formed
+        range that lies outside the file; or None for a header that should be
+        ignored (other units, multiple ranges, malformed specs), in which case
+        the full file is sent as RFC 9110 asks
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    start_str, sep, end_str = spec.strip().partition("-")
+    start_str, end_str = start_str.strip(), end_str.strip()
+    if not sep or not (start_str or end_str):
+        return None
+    if (start_str and not start_str.isdigit()) or (end_str and not end_str.isdigit()):
+        return None
+    
+    if start_str:
+        start = int(start_str)
+        end = int(end_str) if end_str else file_size - 1
+        if end_str and end < start:
+            return None
+        if start >= file_size:
+            return RANGE_NOT_SATISFIABLE
+    else:
+        # Suffix range: the last N bytes
+        suffix_length = int(end_str)
+        if suffix_length == 0 or file_size == 0:
+            return RANGE_NOT_SATISFIABLE
+        start = max(file_size - suffix_length, 0)
+        end = file_size - 1
+    
+    return start, min(end, file_size - 1)
+
+
+async def iter_file_range(file_path: str, start: int, end: int, chunk_size: int = 1 << 20):
+    """Yield the inclusive byte range [start, end] of a file"""
+    remaining = end - start + 1
+    async with aiofiles.open(file_path, 'rb') as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@app.api_route("/files/{job_id}/{filename}", methods=["GET", "HEAD"])
+async def download_file(job_id: str, filename: str, request: Request):
+    """
+    Download a generated file
+    
+    Supports conditional requests (`If-None-Match`) and single byte ranges
+    (`Range`, optionally guarded by `If-Range`) so interrupted downloads can resume.
+    PLY files are sent precompressed (`Content-Encoding: zstd`) to clients that accept it.
+    """
+    if job_id not in generated_files:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    entry = generated_files[job_id]['by_name'].get(filename)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="File not found")
     
-    if not file_path or not os.path.exists(file_path):
+    file_path, media_type = entry
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Determine media type based on file extension
-    ext = Path(filename).suffix.lower()
-    media_type_map = {
-        '.glb': 'model/gltf-binary',
-        '.ply': 'application/octet-stream',
-        '.mp4': 'video/mp4',
+    headers = {
+        # A job's files never change once written, and job IDs are never reused
+        "Cache-Control": "public, max-age=3600, immutable",
     }
-    media_type = media_type_map.get(ext, 'application/octet-stream')
+    zst_etag = None
+    if Path(file_path).suffix.lower() in PRECOMPRESS_SUFFIXES:
+        headers["Vary"] = "Accept-Encoding"
+        zst_path = precompressed_path(file_path)
+        try:
+            zst_stat = os.stat(zst_path)
+        except FileNotFoundError:
+            zst_stat = None
+        
+        # Serve the precompressed sibling whole; byte ranges are only offered
+        # on the identity encoding so resumed downloads stay simple
+        if zst_stat is not None:
+            zst_etag = file_etag(zst_stat)
+            if accepts_encoding(request.headers.get("accept-encoding", ""), "zstd"):
+                headers["ETag"] = zst_etag
+                headers["Content-Encoding"] = "zstd"
+                if request.headers.get("if-none-match") == headers["ETag"]:
+                    return Response(status_code=304, headers=headers)
+                return FileResponse(
+                    path=zst_path,
+                    media_type=media_type,
+                    filename=filename,
+                    stat_result=zst_stat,
+                    headers=headers
+                )
+    
+    etag = file_etag(stat_result)
+    headers["ETag"] = etag
+    headers["Accept-Ranges"] = "bytes"
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A download that started on the zstd copy resumes on the identity file,
+    # which holds the same (decoded) bytes, so its If-Range ETag is accepted too
+    byte_range = None
+    if range_header and (if_range is None or if_range in (etag, zst_etag)):
+        byte_range = parse_byte_range(range_header, stat_result.st_size)
+    
+    if byte_range == RANGE_NOT_SATISFIABLE:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{stat_result.st_size}"}
+        )
+    
+    if byte_range is not None:
+        start, end = byte_range
+        return StreamingResponse(
+            iter_file_range(file_path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end}/{stat_result.st_size}",
+                "Content-Length": str(end - start + 1),
+            }
+        )
     
+    # Passing stat_result lets Starlette skip its own stat and set Content-Length
     return FileResponse(
         path=file_path,
         media_type=media_type,
-        filename=filename
+        filename=filename,
+        stat_result=stat_result,
+        headers=headers
     )
 
 
@@ -85,6 +85,7 @@ class FlowEulerSampler(Sampler):
         steps: int = 50,
         rescale_t: float = 1.0,
         verbose: bool = True,
+        callback: Optional[Callable[[int, int], None]] = None,
         **kwargs
     ):
         """
@@ -97,6 +98,8 @@ class FlowEulerSampler(Sampler):
             steps: The number of steps to sample.
             rescale_t: The rescale factor for t.
             verbose: If True, show a progress bar.
+            callback: If given, called as callback(0, steps) before the first step and as
+                callback(step, steps) after each step.
             **kwargs: Additional arguments for model_inference.
 
         Returns:
@@ -110,11 +113,15 @@ class FlowEulerSampler(Sampler):
         t_seq = rescale_t * t_seq / (1 + (rescale_t - 1) * t_seq)
         t_pairs = list((t_seq[i], t_seq[i + 1]) for i in range(steps))
         ret = edict({"samples": None, "pred_x_t": [], "pred_x_0": []})
-        for t, t_prev in tqdm(t_pairs, desc="Sampling", disable=not verbose):
+        if callback is not None:
+            callback(0, steps)
+        for i, (t, t_prev) in enumerate(tqdm(t_pairs, desc="Sampling", disable=not verbose)):
             out = self.sample_once(model, sample, t, t_prev, cond, **kwargs)
             sample = out.pred_x_prev
             ret.pred_x_t.append(out.pred_x_prev)
             ret.pred_x_0.append(out.pred_x_0)
+            if callback is not None:
+                callback(i + 1, steps)
         ret.samples = sample
         return ret
 
@@ -226,6 +226,96 @@ class TrellisTextTo3DPipeline(Pipeline):
         slat = self.sample_slat(cond, coords, slat_sampler_params)
         return self.decode_slat(slat, formats)
     
+    @torch.no_grad()
+    def run_batch(
+        self,
+        prompts: List[str],
+        seeds: List[int],
+        sparse_structure_sampler_params: dict = {},
+        slat_sampler_params: dict = {},
+        formats: List[str] = ['mesh', 'gaussian', 'radiance_field'],
+    ) -> List[dict]:
+        """
+        Run the pipeline for several prompts in one batch, one sample per prompt.
+
+        Each sample draws its noise from its own seed in the same order as `run`,
+        so a prompt gets the same result whether it is batched or not.
+
+        Args:
+            prompts (List[str]): The text prompts.
+            seeds (List[int]): The random seed of each prompt.
+            sparse_structure_sampler_params (dict): Additional parameters for the sparse structure sampler.
+            slat_sampler_params (dict): Additional parameters for the structured latent sampler.
+            formats (List[str]): The formats to decode the structured latent to.
+
+        Returns:
+            List[Optional[dict]]: The decoded outputs of each prompt, or None for a
+                prompt whose sparse structure came out empty.
+        """
+        assert len(prompts) == len(seeds), "prompts and seeds must have the same length"
+        cond = self.get_cond(prompts)
+        generators = [torch.Generator().manual_seed(seed) for seed in seeds]
+
+        # Sample occupancy latent
+        flow_model = self.models['sparse_structure_flow_model']
+        reso = flow_model.resolution
+        noise = torch.cat([
+            torch.randn(1, flow_model.in_channels, reso, reso, reso, generator=generator)
+            for generator in generators
+        ]).to(self.device)
+        sampler_params = {**self.sparse_structure_sampler_params, **sparse_structure_sampler_params}
+        z_s = self.sparse_structure_sampler.sample(
+            flow_model,
+            noise,
+            **cond,
+            **sampler_params,
+            verbose=True
+        ).samples
+
+        # Decode occupancy latent
+        decoder = self.models['sparse_structure_decoder']
+        coords = torch.argwhere(decoder(z_s)>0)[:, [0, 2, 3, 4]].int()
+
+        # Samples whose occupancy grid came out empty cannot be decoded; leave them
+        # out of the rest of the batch and renumber the others' batch indices
+        counts = torch.bincount(coords[:, 0], minlength=len(prompts)).tolist()
+        kept = [i for i, count in enumerate(counts) if count > 0]
+        if not kept:
+            return [None] * len(prompts)
+        if len(kept) < len(prompts):
+            remap = torch.full((len(prompts),), -1, dtype=coords.dtype, device=coords.device)
+            remap[kept] = torch.arange(len(kept), dtype=coords.dtype, device=coords.device)
+            coords = torch.cat([remap[coords[:, 0].long()][:, None], coords[:, 1:]], dim=1)
+            cond = {**cond, 'cond': cond['cond'][kept]}
+
+        # Sample structured latent; coords are sorted by batch index
+        flow_model = self.models['slat_flow_model']
+        noise = sp.SparseTensor(
+            feats=torch.cat([
+                torch.randn(count, flow_model.in_channels, generator=generator)
+                for count, generator in zip(counts, generators)
+            ]).to(self.device),
+            coords=coords,
+        )
+        sampler_params = {**self.slat_sampler_params, **slat_sampler_params}
+        slat = self.slat_sampler.sample(
+            flow_model,
+            noise,
+            **cond,
+            **sampler_params,
+            verbose=True
+        ).samples
+
+        std = torch.tensor(self.slat_normalization['std'])[None].to(slat.device)
+        mean = torch.tensor(self.slat_normalization['mean'])[None].to(slat.device)
+        slat = slat * std + mean
+
+        outputs = self.decode_slat(slat, formats)
+        results = [None] * len(prompts)
+        for j, i in enumerate(kept):
+            results[i] = {k: [v[j]] for k, v in outputs.items()}
+        return results
+    
     def voxelize(self, mesh: o3d.geometry.TriangleMesh) -> torch.Tensor:
         """
         Voxelize a mesh.
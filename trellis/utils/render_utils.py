@@ -1,3 +1,4 @@
+import functools
 import torch
 import numpy as np
 from tqdm import tqdm
@@ -91,12 +92,19 @@ def render_frames(sample, extrinsics, intrinsics, options={}, colors_overwrite=N
     return rets
 
 
-def render_video(sample, resolution=512, bg_color=(0, 0, 0), num_frames=300, r=2, fov=40, **kwargs):
+# Cached so that renders of several representations along the same orbit share one set of cameras
+@functools.lru_cache(maxsize=4)
+def build_camera_ring(num_frames=300, r=2, fov=40):
     yaws = torch.linspace(0, 2 * 3.1415, num_frames)
     pitch = 0.25 + 0.5 * torch.sin(torch.linspace(0, 2 * 3.1415, num_frames))
     yaws = yaws.tolist()
     pitch = pitch.tolist()
     extrinsics, intrinsics = yaw_pitch_r_fov_to_extrinsics_intrinsics(yaws, pitch, r, fov)
+    return tuple(extrinsics), tuple(intrinsics)
+
+
+def render_video(sample, resolution=512, bg_color=(0, 0, 0), num_frames=300, r=2, fov=40, **kwargs):
+    extrinsics, intrinsics = build_camera_ring(num_frames, r, fov)
     return render_frames(sample, extrinsics, intrinsics, {'resolution': resolution, 'bg_color': bg_color}, **kwargs)
 
 